@@ -16,13 +16,55 @@ logger.critical("🚨 IMPORT_TABLE MODULE LOADED")
 print("📊 IMPORT_TABLE MODULE LOADED", flush=True)
 
 
+class ImportTableColumns(BaseModel):
+    name: List[str]
+    bgg_id: List[Optional[int]]
+    niza_games_rank: List[Optional[int]]
+    genre: List[Optional[str]]
+
+
 class ImportTableRequest(BaseModel):
-    rows: List[dict]
+    # Построчный формат: список словарей игр
+    rows: List[dict] = []
+    # Колоночный формат: значения полей по колонкам, ratings[i][j] - оценка игры i
+    # пользователем user_names[j], None - пользователь пропущен.
+    # Запрос содержит либо rows, либо columns
+    columns: Optional[ImportTableColumns] = None
+    user_names: List[str] = []
+    ratings: List[List[Optional[int]]] = []
     # Если True — принудительно обновляем данные всех игр из BGG,
     # иначе обновляем только те, у которых данные старше месяца.
     is_forced_update: bool = False
 
 
+def _rows_from_columns(request: ImportTableRequest) -> List[dict]:
+    """Собирает строки для replace_all_from_table из колоночного формата запроса."""
+    if request.rows:
+        raise HTTPException(status_code=400, detail="Send either rows or columns, not both")
+
+    columns = request.columns
+    count = len(columns.name)
+    lengths = {len(columns.bgg_id), len(columns.niza_games_rank), len(columns.genre), len(request.ratings)}
+    if lengths != {count}:
+        raise HTTPException(status_code=400, detail="Columns and ratings must have the same length")
+
+    user_names = request.user_names
+    rows = []
+    for name, bgg_id, niza_rank, genre, game_ratings in zip(
+        columns.name, columns.bgg_id, columns.niza_games_rank, columns.genre, request.ratings
+    ):
+        if len(game_ratings) != len(user_names):
+            raise HTTPException(status_code=400, detail="Each ratings row must match user_names")
+        rows.append({
+            "name": name,
+            "bgg_id": bgg_id,
+            "niza_games_rank": niza_rank,
+            "genre": genre,
+            "ratings": {user: rating for user, rating in zip(user_names, game_ratings) if rating is not None},
+        })
+    return rows
+
+
 class ImportTableResponse(BaseModel):
     status: str
     games_imported: int = 0
@@ -42,23 +84,25 @@ async def import_table(
     Updates existing games and creates new ratings. Supports forced updates
     to refresh BGG data for all games.
     """
-    logger.error(f"🚀 IMPORT STARTED: {len(request.rows)} rows, forced_update={request.is_forced_update}")
+    rows = _rows_from_columns(request) if request.columns is not None else request.rows
+
+    logger.error(f"🚀 IMPORT STARTED: {len(rows)} rows, forced_update={request.is_forced_update}")
 
     # Логируем структуру данных для диагностики ошибок
-    if request.rows:
-        sample_ratings = request.rows[0].get('ratings', {})
+    if rows:
+        sample_ratings = rows[0].get('ratings', {})
         logger.error(f"📊 Sample ratings keys: {list(sample_ratings.keys())}")
         logger.error(f"📊 Contains 'общий': {'общий' in sample_ratings}")
-        logger.error(f"📊 Total rows to process: {len(request.rows)}")
+        logger.error(f"📊 Total rows to process: {len(rows)}")
 
     try:
         replace_all_from_table(
             db,
-            request.rows,
+            rows,
             is_forced_update=request.is_forced_update,
         )
         db.commit()
-        logger.info(f"Successfully imported {len(request.rows)} games")
+        logger.info(f"Successfully imported {len(rows)} games")
 
         # Запускаем фоновый перевод описаний для игр, у которых его нет
         logger.info("🎯 Scheduling background translation task for imported games")
@@ -66,7 +110,7 @@ async def import_table(
 
         return ImportTableResponse(
             status="ok",
-            games_imported=len(request.rows),
+            games_imported=len(rows),
             message="Import completed. Translation started in background."
         )
     except HTTPException:
@@ -76,9 +120,9 @@ async def import_table(
         db.rollback()
         logger.error(f"Error importing table data: {type(exc).__name__}: {exc}", exc_info=True)
         # Логируем детали запроса для диагностики
-        logger.error(f"Request details: rows={len(request.rows)}, forced_update={request.is_forced_update}")
-        if request.rows:
-            logger.error(f"First row sample: {request.rows[0]}")
+        logger.error(f"Request details: rows={len(rows)}, forced_update={request.is_forced_update}")
+        if rows:
+            logger.error(f"First row sample: {rows[0]}")
         raise HTTPException(status_code=400, detail=f"Data import error: {type(exc).__name__}: {str(exc)}")
 
 
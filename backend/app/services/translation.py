@@ -257,12 +257,36 @@ class TranslationService:
 # Глобальный экземпляр сервиса
 translation_service = TranslationService()
 
+# Идёт ли сейчас проход перевода и просили ли новый, пока он шёл
+_translation_running = False
+_translation_rerun_requested = False
+
 
 async def translate_game_descriptions_background(db: Session) -> None:
     """
     Фоновая задача для перевода описаний игр.
     Вызывается из FastAPI BackgroundTasks.
 
+    Одновременно выполняется только один проход: импорт частями запускает
+    задачу после каждой части, и параллельные проходы переводили бы одни и те же
+    игры. Запросы, пришедшие во время прохода, объединяются в один повторный
+    проход, который подхватит игры из последних частей.
+
     :param db: Сессия базы данных
     """
-    await translation_service.translate_game_descriptions_background(db)
\ No newline at end of file
+    global _translation_running, _translation_rerun_requested
+
+    if _translation_running:
+        _translation_rerun_requested = True
+        logger.info("Background translation already running, scheduling one more pass")
+        return
+
+    _translation_running = True
+    try:
+        while True:
+            _translation_rerun_requested = False
+            await translation_service.translate_game_descriptions_background(db)
+            if not _translation_rerun_requested:
+                break
+    finally:
+        _translation_running = False
\ No newline at end of file
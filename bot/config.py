@@ -19,6 +19,8 @@ class BotConfig:
 
     # Google Sheets
     RATING_SHEET_CSV_URL: str = os.getenv("RATING_SHEET_CSV_URL", "")
+    # Файл с ETag/Last-Modified последней загрузки таблицы (пусто - не кешировать)
+    SHEET_CACHE_PATH: str = os.getenv("SHEET_CACHE_PATH", "/tmp/rating_sheet_cache.json")
 
     # Настройки подключения к БД (для отладки/прямого доступа)
     DB_HOST: str = os.getenv("DB_HOST", "localhost")
@@ -35,6 +37,9 @@ class BotConfig:
     # Настройки бота
     WEBHOOK_URL: Optional[str] = os.getenv("WEBHOOK_URL")
     WEBHOOK_PATH: str = os.getenv("WEBHOOK_PATH", "/webhook")
+    WEBHOOK_HOST: str = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+    WEBHOOK_PORT: int = int(os.getenv("WEBHOOK_PORT", "8080"))
+    WEBHOOK_SECRET: Optional[str] = os.getenv("WEBHOOK_SECRET") or None
 
     # Режим работы
     POLLING: bool = os.getenv("POLLING", "true").lower() == "true"
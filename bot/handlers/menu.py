@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import logging
-import httpx
+
 from aiogram import Router
 from aiogram.filters import CommandStart
 from aiogram.types import CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup, Message
@@ -125,7 +125,7 @@ async def handle_menu_callbacks(
 
         elif action == "start_ranking":
             # Вызываем функцию начала ранжирования напрямую
-            await cmd_start_ranking(callback.message, state)
+            await cmd_start_ranking(callback.message, state, api_base_url)
 
         elif action == "import":
             # Проверяем, что пользователь админ
@@ -151,17 +151,6 @@ async def handle_menu_callbacks(
 
             logger.info(f"Using CSV URL: {config.RATING_SHEET_CSV_URL}")
 
-            # Проверяем доступность backend
-            try:
-                async with httpx.AsyncClient() as client:
-                    response = await client.get(f"{api_base_url}/health", timeout=5.0)
-                    if response.status_code != 200:
-                        await callback.message.answer(f"❌ Backend недоступен: HTTP {response.status_code}")
-                        return
-            except Exception as exc:
-                await callback.message.answer(f"❌ Не удалось подключиться к backend: {exc}")
-                return
-
             try:
                 logger.info(f"Starting import with CSV URL: {config.RATING_SHEET_CSV_URL}")
                 imported_count = await import_ratings_from_sheet(
@@ -170,7 +159,12 @@ async def handle_menu_callbacks(
                 )
                 logger.info(f"Import completed: {imported_count} games processed")
 
-                if imported_count == 0:
+                if imported_count is None:
+                    await callback.message.answer(
+                        "ℹ️ Таблица не менялась с прошлого импорта, данные не отправлялись.\n\n"
+                        "Чтобы загрузить её заново и обновить данные BGG, используй /import force"
+                    )
+                elif imported_count == 0:
                     logger.warning("Import completed but no games were imported")
                     await callback.message.answer(
                         "⚠️ Импорт завершен, но игры не были загружены.\n\n"
@@ -1,17 +1,170 @@
 from __future__ import annotations
 
+import asyncio
 import logging
+from typing import Set
+
 import httpx
+import orjson
 from aiogram import Router
+from aiogram.exceptions import TelegramBadRequest
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
-from aiogram.types import CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup, Message
+from aiogram.types import (
+    CallbackQuery,
+    InlineKeyboardButton,
+    InlineKeyboardMarkup,
+    InputMediaPhoto,
+    Message,
+)
+
+from services.http_client import get_client
 
 logger = logging.getLogger(__name__)
 
 router = Router()
 
+_JSON_HEADERS = {"content-type": "application/json"}
+
+# Ограничение числа одновременных запросов к backend
+_START_SEM = asyncio.Semaphore(20)
+_ANSWER_SEM = asyncio.Semaphore(50)
+# Сколько секунд ждать свободного слота на старт ранжирования
+_START_WAIT_TIMEOUT = 5.0
+
+# Неизменяемые части текста карточки игры
+_GAME_PREFIX = "Игра: <b>"
+_NAME_SUFFIX = "</b>"
+_FIRST_PREFIX = "Начинаем формировать твой рейтинг!\n\n" + _GAME_PREFIX
+_SECOND_TIER_PREFIX = "Отлично! Теперь уточним, какие игры прямо топчик.\n\n" + _GAME_PREFIX
+_FIRST_TIER_PROMPT = "\nОтметь, насколько она тебе понравилась."
+_SECOND_TIER_PROMPT = "\nВыбери, насколько она крутая."
+
+# Максимальная пауза перед повтором запроса после 429, в секундах
+_RETRY_AFTER_MAX = 10.0
+
+_RESTART_KB = InlineKeyboardMarkup(
+    inline_keyboard=[
+        [
+            InlineKeyboardButton(
+                text="🔄 Начать заново",
+                callback_data="restart_ranking",
+            )
+        ]
+    ]
+)
+
+# Сессии, ответ в которых сейчас отправляется в API. Один ответ на сессию:
+# backend обновляет tiers сессии через read-modify-write
+_inflight: Set[int] = set()
+
+
+async def _show_game_card(
+    callback: CallbackQuery,
+    text: str,
+    thumbnail: str | None,
+    keyboard: InlineKeyboardMarkup,
+) -> None:
+    """
+    Показывает карточку следующей игры, редактируя текущее сообщение.
+
+    Редактирование не создаёт новых сообщений в чате и не упирается в лимит
+    на отправку. Если отредактировать сообщение нельзя (например, тип
+    сообщения не совпадает), отправляем новое.
+    """
+    try:
+        if thumbnail:
+            await callback.message.edit_media(
+                media=InputMediaPhoto(media=thumbnail, caption=text),
+                reply_markup=keyboard,
+            )
+        else:
+            await callback.message.edit_text(text, reply_markup=keyboard)
+        return
+    except TelegramBadRequest as e:
+        logger.debug(f"Cannot edit game card, sending new message: {e}")
+
+    if thumbnail:
+        await callback.message.answer_photo(photo=thumbnail, caption=text, reply_markup=keyboard)
+    else:
+        await callback.message.answer(text, reply_markup=keyboard)
+
+
+def _game_card_text(game: dict, phase: str) -> str:
+    usersrated = game.get("usersrated")
+    usersrated_text = f" (👥 {usersrated})" if usersrated else ""
+    year = game.get("yearpublished")
+    year_text = f" ({year})" if year else ""
+    bgg_rank = game.get("bgg_rank")
+    bgg_text = f"\nBGG: #{bgg_rank}" if bgg_rank else ""
+    if phase == "second_tier":
+        return "".join((
+            _SECOND_TIER_PREFIX, game["name"], _NAME_SUFFIX,
+            year_text, usersrated_text, bgg_text, _SECOND_TIER_PROMPT,
+        ))
+    return "".join((
+        _GAME_PREFIX, game["name"], _NAME_SUFFIX,
+        year_text, usersrated_text, bgg_text, _FIRST_TIER_PROMPT,
+    ))
+
+
+def _game_card_keyboard(phase: str, session_id: int, game_id: int) -> InlineKeyboardMarkup:
+    if phase == "second_tier":
+        return _second_tier_keyboard(session_id=session_id, game_id=game_id)
+    return _first_tier_keyboard(session_id=session_id, game_id=game_id)
+
+
+async def _post_answer(url: str, body: bytes) -> httpx.Response:
+    """
+    Отправляет ответ в API. На 429 один раз повторяет запрос после паузы
+    из заголовка Retry-After, чтобы не превращать ограничение в шквал повторов.
+    """
+    client = get_client()
+    async with _ANSWER_SEM:
+        resp = await client.post(url, content=body, headers=_JSON_HEADERS, timeout=30.0)
+    if resp.status_code == 429:
+        try:
+            retry_after = float(resp.headers.get("retry-after", "1"))
+        except ValueError:
+            retry_after = 1.0
+        retry_after = min(max(retry_after, 0.0), _RETRY_AFTER_MAX)
+        logger.warning(f"Rate limited by backend, retrying in {retry_after}s: {url}")
+        await asyncio.sleep(retry_after)
+        async with _ANSWER_SEM:
+            resp = await client.post(url, content=body, headers=_JSON_HEADERS, timeout=30.0)
+    resp.raise_for_status()
+    return resp
+
+
+async def _reset_after_server_error(callback: CallbackQuery, state: FSMContext) -> None:
+    """Сбрасывает состояние после ошибки сервера, чтобы повторные нажатия не били в сломанный API."""
+    await state.clear()
+    await callback.message.answer(
+        "Ошибка сервера, ранжирование прервано. Попробуй начать заново.",
+        reply_markup=_RESTART_KB,
+    )
+
+
+async def _submit_answer(
+    callback: CallbackQuery,
+    state: FSMContext,
+    api_base_url: str,
+    phase: str,
+    session_id: int,
+    game_id: int,
+    tier: str,
+) -> dict:
+    """Отправляет ответ пользователя и показывает следующую игру по ответу API."""
+    endpoint = "answer-second" if phase == "second_tier" else "answer-first"
+    resp = await _post_answer(
+        f"{api_base_url}/api/ranking/{endpoint}",
+        orjson.dumps({"session_id": session_id, "game_id": game_id, "tier": tier}),
+    )
+    payload = orjson.loads(resp.content)
+    await _handle_phase_transition(callback, state, payload, session_id)
+    return payload
+
 
 async def _handle_phase_transition(
     callback: CallbackQuery,
@@ -22,69 +175,17 @@ async def _handle_phase_transition(
     """Обрабатывает переходы между состояниями на основе phase из API ответа."""
     phase = payload.get("phase")
 
-    if phase == "first_tier":
-        await state.set_state(RankingStates.first_tier)
-        game = payload["next_game"]
-        usersrated = game.get("usersrated")
-        usersrated_text = f" (👥 {usersrated})" if usersrated else ""
-        year = game.get("yearpublished")
-        year_text = f" ({year})" if year else ""
-        bgg_rank = game.get("bgg_rank")
-        bgg_text = f"\nBGG: #{bgg_rank}" if bgg_rank else ""
-        text = (
-            f"Игра: <b>{game['name']}</b>{year_text}{usersrated_text}{bgg_text}\n"
-            f"Отметь, насколько она тебе понравилась."
+    if phase in ("first_tier", "second_tier"):
+        await state.set_state(
+            RankingStates.second_tier if phase == "second_tier" else RankingStates.first_tier
         )
-        thumbnail = game.get("thumbnail")
-        if thumbnail:
-            await callback.message.answer_photo(
-                photo=thumbnail,
-                caption=text,
-                reply_markup=_first_tier_keyboard(
-                    session_id=session_id,
-                    game_id=game["id"],
-                ),
-            )
-        else:
-            await callback.message.answer(
-                text,
-                reply_markup=_first_tier_keyboard(
-                    session_id=session_id,
-                    game_id=game["id"],
-                ),
-            )
-    elif phase == "second_tier":
-        await state.set_state(RankingStates.second_tier)
         game = payload["next_game"]
-        usersrated = game.get("usersrated")
-        usersrated_text = f" (👥 {usersrated})" if usersrated else ""
-        year = game.get("yearpublished")
-        year_text = f" ({year})" if year else ""
-        bgg_rank = game.get("bgg_rank")
-        bgg_text = f"\nBGG: #{bgg_rank}" if bgg_rank else ""
-        text = (
-            "Отлично! Теперь уточним, какие игры прямо топчик.\n\n"
-            f"Игра: <b>{game['name']}</b>{year_text}{usersrated_text}{bgg_text}\n"
-            f"Выбери, насколько она крутая."
+        await _show_game_card(
+            callback,
+            _game_card_text(game, phase),
+            game.get("thumbnail"),
+            _game_card_keyboard(phase, session_id, game["id"]),
         )
-        thumbnail = game.get("thumbnail")
-        if thumbnail:
-            await callback.message.answer_photo(
-                photo=thumbnail,
-                caption=text,
-                reply_markup=_second_tier_keyboard(
-                    session_id=session_id,
-                    game_id=game["id"],
-                ),
-            )
-        else:
-            await callback.message.answer(
-                text,
-                reply_markup=_second_tier_keyboard(
-                    session_id=session_id,
-                    game_id=game["id"],
-                ),
-            )
     elif phase == "final":
         await state.set_state(RankingStates.final)
         top = payload.get("top", [])
@@ -163,37 +264,46 @@ async def _send_first_tier_question(
     logger.info(f"Starting ranking for user_id: {user_id}")
     try:
         # Сначала получаем внутренний UUID пользователя
-        async with httpx.AsyncClient() as client:
-            user_resp = await client.post(
-                f"{api_base_url}/api/users",
-                json={"telegram_id": user_id, "name": message.from_user.full_name or str(user_id)},
-                timeout=10.0,
-            )
-            user_resp.raise_for_status()
-            user_data = user_resp.json()
-            internal_user_id = user_data["id"]
-
-        # Теперь запускаем ранжирование
-        async with httpx.AsyncClient() as client:
+        client = get_client()
+        user_resp = await client.post(
+            f"{api_base_url}/api/users",
+            content=orjson.dumps(
+                {"telegram_id": user_id, "name": message.from_user.full_name or str(user_id)}
+            ),
+            headers=_JSON_HEADERS,
+            timeout=10.0,
+        )
+        user_resp.raise_for_status()
+        user_data = orjson.loads(user_resp.content)
+        internal_user_id = user_data["id"]
+
+        # Теперь запускаем ранжирование, ограничивая число одновременных стартов
+        try:
+            await asyncio.wait_for(_START_SEM.acquire(), timeout=_START_WAIT_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.warning(f"Too many concurrent ranking starts, rejecting user_id: {user_id}")
+            raise RuntimeError("Сервис загружен, попробуйте через минуту")
+        try:
             resp = await client.post(
                 f"{api_base_url}/api/ranking/start",
-                json={"user_id": internal_user_id},
+                content=orjson.dumps({"user_id": internal_user_id}),
+                headers=_JSON_HEADERS,
                 timeout=30.0,
             )
-            resp.raise_for_status()
+        finally:
+            _START_SEM.release()
+        resp.raise_for_status()
 
-        data = resp.json()
+        data = orjson.loads(resp.content)
         session_id = data["session_id"]
         game = data["game"]
         logger.info(f"Ranking session started: session_id={session_id}, first_game={game['name']}")
 
         usersrated = game.get("usersrated")
         usersrated_text = f" (👥 {usersrated})" if usersrated else ""
-        text = (
-            f"Начинаем формировать твой рейтинг!\n\n"
-            f"Игра: <b>{game['name']}</b>{usersrated_text}\n"
-            f"Отметь, насколько она тебе понравилась."
-        )
+        text = "".join((
+            _FIRST_PREFIX, game["name"], _NAME_SUFFIX, usersrated_text, _FIRST_TIER_PROMPT,
+        ))
         thumbnail = game.get("thumbnail")
         if thumbnail:
             await message.answer_photo(
@@ -207,16 +317,15 @@ async def _send_first_tier_question(
                 reply_markup=_first_tier_keyboard(session_id=session_id, game_id=game["id"]),
             )
     except httpx.HTTPStatusError as e:
-        logger.error(f"HTTP error starting ranking for {user_name}: {e.response.status_code}")
+        logger.error(f"HTTP error starting ranking for user_id {user_id}: {e.response.status_code}")
         raise
     except Exception as e:
-        logger.error(f"Error starting ranking for {user_name}: {e}", exc_info=True)
+        logger.error(f"Error starting ranking for user_id {user_id}: {e}", exc_info=True)
         raise
 
 
 @router.message(Command("start_ranking"))
-async def cmd_start_ranking(message: Message, state: FSMContext):
-    api_base_url = message.bot["api_base_url"]
+async def cmd_start_ranking(message: Message, state: FSMContext, api_base_url: str):
     user_name = message.from_user.full_name or str(message.from_user.id)
     user_id = message.from_user.id
 
@@ -255,30 +364,27 @@ async def handle_first_tier_callback(callback: CallbackQuery, state: FSMContext,
         await callback.answer("Некорректный тип действия для текущего этапа.", show_alert=True)
         return
 
-    await callback.answer()
+    # Нажатие, пока предыдущий ответ этой сессии ещё обрабатывается
+    if session_id in _inflight:
+        await callback.answer("Уже обрабатываю...")
+        return
+    _inflight.add(session_id)
 
     try:
-        async with httpx.AsyncClient() as client:
-            resp = await client.post(
-                f"{api_base_url}/api/ranking/answer-first",
-                json={
-                    "session_id": session_id,
-                    "game_id": game_id,
-                    "tier": tier,
-                },
-                timeout=30.0,
-            )
-            resp.raise_for_status()
-
-        payload = resp.json()
+        await callback.answer()
+        payload = await _submit_answer(callback, state, api_base_url, "first_tier", session_id, game_id, tier)
         logger.debug(f"First tier answer processed: session_id={session_id}, phase={payload.get('phase')}")
-        await _handle_phase_transition(callback, state, payload, session_id)
     except httpx.HTTPStatusError as e:
         logger.error(f"HTTP error processing first tier answer: {e.response.status_code}")
-        await callback.message.answer(f"Ошибка при обновлении рейтинга: {e.response.status_code}")
+        if 500 <= e.response.status_code < 600:
+            await _reset_after_server_error(callback, state)
+        else:
+            await callback.message.answer(f"Ошибка при обновлении рейтинга: {e.response.status_code}")
     except Exception as exc:  # noqa: BLE001
         logger.error(f"Error processing first tier callback: {exc}", exc_info=True)
         await callback.message.answer(f"Ошибка при обновлении рейтинга: {exc}")
+    finally:
+        _inflight.discard(session_id)
 
 
 @router.callback_query(RankingStates.second_tier)
@@ -305,30 +411,27 @@ async def handle_second_tier_callback(callback: CallbackQuery, state: FSMContext
         await callback.answer("Некорректный тип действия для текущего этапа.", show_alert=True)
         return
 
-    await callback.answer()
+    # Нажатие, пока предыдущий ответ этой сессии ещё обрабатывается
+    if session_id in _inflight:
+        await callback.answer("Уже обрабатываю...")
+        return
+    _inflight.add(session_id)
 
     try:
-        async with httpx.AsyncClient() as client:
-            resp = await client.post(
-                f"{api_base_url}/api/ranking/answer-second",
-                json={
-                    "session_id": session_id,
-                    "game_id": game_id,
-                    "tier": tier,
-                },
-                timeout=30.0,
-            )
-            resp.raise_for_status()
-
-        payload = resp.json()
+        await callback.answer()
+        payload = await _submit_answer(callback, state, api_base_url, "second_tier", session_id, game_id, tier)
         logger.debug(f"Second tier answer processed: session_id={session_id}, phase={payload.get('phase')}")
-        await _handle_phase_transition(callback, state, payload, session_id)
     except httpx.HTTPStatusError as e:
         logger.error(f"HTTP error processing second tier answer: {e.response.status_code}")
-        await callback.message.answer(f"Ошибка при обновлении рейтинга: {e.response.status_code}")
+        if 500 <= e.response.status_code < 600:
+            await _reset_after_server_error(callback, state)
+        else:
+            await callback.message.answer(f"Ошибка при обновлении рейтинга: {e.response.status_code}")
     except Exception as exc:  # noqa: BLE001
         logger.error(f"Error processing second tier callback: {exc}", exc_info=True)
         await callback.message.answer(f"Ошибка при обновлении рейтинга: {exc}")
+    finally:
+        _inflight.discard(session_id)
 
 
 @router.callback_query(RankingStates.final)
@@ -336,18 +439,7 @@ async def handle_final_callback(callback: CallbackQuery, state: FSMContext, api_
     """
     Обрабатывает callback-данные в состоянии final (результаты готовы).
     """
-    keyboard = InlineKeyboardMarkup(
-        inline_keyboard=[
-            [
-                InlineKeyboardButton(
-                    text="🔄 Начать заново",
-                    callback_data="restart_ranking",
-                )
-            ]
-        ]
-    )
-
-    await callback.message.edit_reply_markup(reply_markup=keyboard)
+    await callback.message.edit_reply_markup(reply_markup=_RESTART_KB)
     await callback.answer("Хотите начать новое ранжирование?", show_alert=True)
 
 
@@ -356,18 +448,7 @@ async def handle_completed_callback(callback: CallbackQuery, state: FSMContext,
     """
     Обрабатывает callback-данные в состоянии completed (ранжирование окончено).
     """
-    keyboard = InlineKeyboardMarkup(
-        inline_keyboard=[
-            [
-                InlineKeyboardButton(
-                    text="🔄 Начать заново",
-                    callback_data="restart_ranking",
-                )
-            ]
-        ]
-    )
-
-    await callback.message.edit_reply_markup(reply_markup=keyboard)
+    await callback.message.edit_reply_markup(reply_markup=_RESTART_KB)
     await callback.answer("Хотите начать новое ранжирование?", show_alert=True)
 
 
@@ -6,12 +6,13 @@ from dotenv import load_dotenv
 # Загружаем переменные окружения из .env файла
 load_dotenv()
 
+from aiohttp import web
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
 from aiogram.filters import Command, CommandStart
 from aiogram.types import Message
-from typing import Dict, Any
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
 
 from handlers.ranking import router as ranking_router
 from handlers.bgg_game import router as bgg_game_router
@@ -20,6 +21,7 @@ from handlers.my_games import router as my_games_router
 from handlers.menu import router as menu_router
 from services.import_ratings import import_ratings_from_sheet
 from services.clear_database import clear_database
+from services.http_client import close_client
 from config import config
 
 # Настройка логирования
@@ -40,24 +42,8 @@ logging.getLogger("aiohttp").setLevel(logging.WARNING)
 
 logger = logging.getLogger(__name__)
 
-async def api_base_url_middleware(
-    handler,
-    event,
-    data: Dict[str, Any]
-) -> Any:
-    """Middleware для передачи API_BASE_URL в handlers."""
-    data["api_base_url"] = config.API_BASE_URL
-    return await handler(event, data)
-
-
-async def default_language_middleware(
-    handler,
-    event,
-    data: Dict[str, Any]
-) -> Any:
-    """Middleware для передачи DEFAULT_LANGUAGE в handlers."""
-    data["default_language"] = config.DEFAULT_LANGUAGE
-    return await handler(event, data)
+# Бот обрабатывает только сообщения и нажатия на inline-кнопки
+ALLOWED_UPDATES = ["message", "callback_query"]
 
 
 # Функция on_start удалена - теперь используется роутер menu
@@ -72,12 +58,14 @@ async def on_import(message: Message):
     user_name = message.from_user.full_name or str(user_id)
     
     # Проверка прав доступа
-    if not config.is_admin(message.from_user.id):
+    if not config.is_admin(user_id):
         logger.warning(f"Non-admin user {user_name} (ID: {user_id}) attempted to import ratings")
         await message.answer("❌ У вас нет прав для выполнения этой команды.")
         return
 
-    logger.info(f"Admin {user_name} (ID: {user_id}) started ratings import")
+    # "/import force" загружает таблицу заново, даже если она не менялась
+    force = "force" in (message.text or "").split()[1:]
+    logger.info(f"Admin {user_name} (ID: {user_id}) started ratings import (force={force})")
 
     # Отправляем начальное сообщение
     await message.answer("🚀 Начинаю импорт данных из Google Sheets...")
@@ -86,9 +74,16 @@ async def on_import(message: Message):
         imported_count = await import_ratings_from_sheet(
             api_base_url=config.API_BASE_URL,
             sheet_csv_url=config.RATING_SHEET_CSV_URL,
+            force=force,
         )
 
-        if imported_count == 0:
+        if imported_count is None:
+            logger.info("Sheet not modified, nothing imported")
+            await message.answer(
+                "ℹ️ Таблица не менялась с прошлого импорта, данные не отправлялись.\n\n"
+                "Чтобы загрузить её заново и обновить данные BGG, используй /import force"
+            )
+        elif imported_count == 0:
             logger.warning("Import completed but no games were imported")
             await message.answer("⚠️ Таблица пуста или данные не найдены.")
         else:
@@ -115,7 +110,7 @@ async def on_clear_database(message: Message):
     user_name = message.from_user.full_name or str(user_id)
 
     # Проверка прав доступа
-    if not config.is_admin(message.from_user.id):
+    if not config.is_admin(user_id):
         logger.warning(f"Non-admin user {user_name} (ID: {user_id}) attempted to clear database")
         await message.answer("❌ У вас нет прав для выполнения этой команды.")
         return
@@ -149,6 +144,40 @@ async def on_clear_database(message: Message):
         await message.answer(f"❌ Неожиданная ошибка при очистке базы данных: {exc}")
 
 
+async def _run_webhook(dp: Dispatcher, bot: Bot) -> None:
+    """
+    Запускает бота в режиме webhook: Telegram сам присылает обновления
+    на aiohttp-сервер, без long-polling запросов getUpdates.
+    """
+    app = web.Application()
+    SimpleRequestHandler(
+        dispatcher=dp,
+        bot=bot,
+        secret_token=config.WEBHOOK_SECRET,
+    ).register(app, path=config.WEBHOOK_PATH)
+    setup_application(app, dp, bot=bot)
+
+    webhook_url = f"{config.WEBHOOK_URL.rstrip('/')}{config.WEBHOOK_PATH}"
+    await bot.set_webhook(
+        webhook_url,
+        max_connections=100,
+        allowed_updates=ALLOWED_UPDATES,
+        secret_token=config.WEBHOOK_SECRET,
+    )
+    logger.info(f"Webhook set: {webhook_url}")
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host=config.WEBHOOK_HOST, port=config.WEBHOOK_PORT)
+    await site.start()
+    logger.info(f"Webhook server listening on {config.WEBHOOK_HOST}:{config.WEBHOOK_PORT}")
+
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
 async def main():
     logger.info("Starting bot...")
 
@@ -163,10 +192,11 @@ async def main():
     bot = Bot(token=config.BOT_TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
     logger.info("Bot instance created")
 
-    dp = Dispatcher()
-    dp.update.middleware(api_base_url_middleware)
-    dp.update.middleware(default_language_middleware)
-    logger.debug("Middleware registered")
+    # Константы передаются в handlers через workflow_data диспетчера
+    dp = Dispatcher(
+        api_base_url=config.API_BASE_URL,
+        default_language=config.DEFAULT_LANGUAGE,
+    )
 
     # Команды верхнего уровня - теперь обрабатываются через роутеры
     dp.message.register(on_import, Command("import"))
@@ -181,8 +211,16 @@ async def main():
     dp.include_router(my_games_router)
     logger.info("Routers included")
 
-    logger.info("Starting polling...")
-    await dp.start_polling(bot)
+    try:
+        if config.is_production:
+            await _run_webhook(dp, bot)
+        else:
+            # Вебхук от прошлого запуска с WEBHOOK=true блокирует getUpdates
+            await bot.delete_webhook()
+            logger.info("Starting polling...")
+            await dp.start_polling(bot, allowed_updates=ALLOWED_UPDATES)
+    finally:
+        await close_client()
 
 
 if __name__ == "__main__":
@@ -2,6 +2,9 @@ import logging
 
 import httpx
 
+from services.http_client import get_client
+from services.import_ratings import clear_sheet_cache
+
 logger = logging.getLogger(__name__)
 
 
@@ -18,16 +21,20 @@ async def clear_database(api_base_url: str) -> dict:
     logger.info(f"Sending clear request to: {clear_url}")
 
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            resp = await client.post(
-                clear_url,
-                json={"confirm": True},
-            )
-            resp.raise_for_status()
+        client = get_client()
+        resp = await client.post(
+            clear_url,
+            json={"confirm": True},
+            timeout=30.0,
+        )
+        resp.raise_for_status()
 
         result = resp.json()
         logger.info(f"Database cleared successfully: {result}")
 
+        # После очистки неизменённая таблица должна импортироваться заново
+        clear_sheet_cache()
+
         return result
 
     except httpx.HTTPStatusError as e:
@@ -0,0 +1,40 @@
+import logging
+
+import httpx
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+
+_HTTP_CLIENT: httpx.AsyncClient | None = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """
+    Возвращает общий httpx.AsyncClient для запросов к backend.
+
+    Клиент создаётся один раз и переиспользует соединения между запросами.
+    HTTP/2 включается, если его поддерживает сервер (согласуется через TLS ALPN):
+    запросы к Google Sheets мультиплексируются в одном соединении, а backend по
+    обычному http остаётся на HTTP/1.1 с keep-alive.
+    """
+    global _HTTP_CLIENT
+    if _HTTP_CLIENT is None or _HTTP_CLIENT.is_closed:
+        limits = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+        _HTTP_CLIENT = httpx.AsyncClient(
+            base_url=config.API_BASE_URL,
+            transport=httpx.AsyncHTTPTransport(retries=1, http2=True, limits=limits),
+            timeout=httpx.Timeout(config.REQUEST_TIMEOUT, connect=config.CONNECT_TIMEOUT),
+        )
+        logger.debug("Shared HTTP client created")
+    return _HTTP_CLIENT
+
+
+async def close_client() -> None:
+    """Закрывает общий клиент при остановке бота."""
+    global _HTTP_CLIENT
+    if _HTTP_CLIENT is not None:
+        await _HTTP_CLIENT.aclose()
+        _HTTP_CLIENT = None
+        logger.debug("Shared HTTP client closed")
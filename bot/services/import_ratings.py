@@ -1,15 +1,22 @@
+import asyncio
 import csv
-import io
 import logging
-import time
-from typing import List, Dict, Optional, Callable, Union
+import os
+import random
+from typing import AsyncIterator, Awaitable, List, Dict, Optional, Callable, Tuple
 
 import httpx
+import orjson
+
+from config import config
+from services.http_client import get_client
 
 logger = logging.getLogger(__name__)
 
+__all__ = ["import_ratings_from_sheet", "clear_sheet_cache", "GENRE_MAPPING", "IMPORT_CHUNK_SIZE"]
+
 
-# Маппинг русских названий жанров на английские enum значения
+# Маппинг русских названий жанров на английские enum значения (ключи уже в casefold)
 GENRE_MAPPING = {
     "стратегия": "strategy",
     "семейка": "family",
@@ -20,27 +27,113 @@ GENRE_MAPPING = {
     "абстракт": "abstract",
 }
 
+_GENRE_GET = GENRE_MAPPING.get
+
+# Значение ячейки, означающее, что игру не нужно учитывать для пользователя
+_NO_RATING = "нет"
+
+_JSON_HEADERS = {"content-type": "application/json"}
+
+# Быстро сдаёмся на connect/pool, чтобы сработал повтор, но даём backend время на запись и BGG
+IMPORT_TIMEOUT = httpx.Timeout(connect=5.0, read=120.0, write=30.0, pool=5.0)
+HEALTH_TIMEOUT = httpx.Timeout(connect=1.0, read=5.0, write=5.0, pool=1.0)
+
+# Сколько игр отправлять в backend за один запрос
+IMPORT_CHUNK_SIZE = 500
+# Сколько частей отправлять одновременно: backend ходит в BGG по каждой игре,
+# поэтому параллельность держим небольшой
+IMPORT_CONCURRENCY = 2
+
+
+async def _wait_for_backend(
+    api_base_url: str,
+    timeout: float = 60.0,
+    initial_delay: float = 0.1,
+    max_delay: float = 2.0,
+) -> None:
+    """
+    Ожидает готовности backend API.
 
-async def _wait_for_backend(api_base_url: str, max_attempts: int = 30, delay: float = 2.0) -> None:
-    """Ожидает готовности backend API."""
-    health_url = f"{api_base_url}/health"
+    Интервал между проверками растёт от initial_delay до max_delay со случайным
+    разбросом, чтобы быстро поймать уже поднятый backend и не долбить его при старте.
+    """
+    # URL разбирается один раз, а не на каждой попытке опроса
+    health_url = httpx.URL(f"{api_base_url.rstrip('/')}/health")
+    client = get_client()
     logger.info(f"Waiting for backend to be ready: {health_url}")
 
-    for attempt in range(max_attempts):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    delay = initial_delay
+    attempt = 0
+
+    while True:
+        attempt += 1
         try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                resp = await client.get(health_url)
-                if resp.status_code == 200:
-                    logger.info(f"Backend is ready after {attempt + 1} attempts")
-                    return
+            resp = await client.get(health_url, timeout=HEALTH_TIMEOUT)
+            if resp.status_code == 200:
+                logger.info(f"Backend is ready after {attempt} attempts")
+                return
         except Exception as e:
-            logger.debug(f"Backend not ready yet (attempt {attempt + 1}/{max_attempts}): {e}")
+            logger.debug(f"Backend not ready yet (attempt {attempt}): {e}")
+
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            break
+        await asyncio.sleep(min(delay + random.uniform(0, 0.1 * delay), remaining))
+        delay = min(delay * 1.6, max_delay)
+
+    logger.error(f"Backend did not become available after {attempt} attempts ({timeout:g}s)")
+    raise RuntimeError(f"Backend не стал доступен за {timeout:g} с")
+
+
+def _load_sheet_cache(sheet_csv_url: str) -> Dict:
+    """Возвращает сохранённые заголовки последней загрузки этой таблицы или пустой словарь."""
+    if not config.SHEET_CACHE_PATH:
+        return {}
+    try:
+        with open(config.SHEET_CACHE_PATH, "rb") as f:
+            cache = orjson.loads(f.read())
+    except FileNotFoundError:
+        return {}
+    except (OSError, orjson.JSONDecodeError) as e:
+        logger.warning(f"Could not read sheet cache {config.SHEET_CACHE_PATH}: {e}")
+        return {}
+    return cache if cache.get("url") == sheet_csv_url else {}
+
+
+def _save_sheet_cache(sheet_csv_url: str, headers: httpx.Headers) -> None:
+    """Сохраняет ETag/Last-Modified успешно импортированной таблицы."""
+    if not config.SHEET_CACHE_PATH:
+        return
+    etag = headers.get("etag")
+    last_modified = headers.get("last-modified")
+    if not etag and not last_modified:
+        # Без валидаторов условный запрос невозможен, старый кеш больше не актуален
+        clear_sheet_cache()
+        return
+    cache = {
+        "url": sheet_csv_url,
+        "etag": etag,
+        "last_modified": last_modified,
+    }
+    try:
+        with open(config.SHEET_CACHE_PATH, "wb") as f:
+            f.write(orjson.dumps(cache))
+    except OSError as e:
+        logger.warning(f"Could not write sheet cache {config.SHEET_CACHE_PATH}: {e}")
 
-        if attempt < max_attempts - 1:
-            time.sleep(delay)
 
-    logger.error(f"Backend did not become available after {max_attempts} attempts")
-    raise RuntimeError(f"Backend не стал доступен после {max_attempts} попыток")
+def clear_sheet_cache() -> None:
+    """Сбрасывает кеш таблицы, чтобы следующий импорт загрузил её заново."""
+    if not config.SHEET_CACHE_PATH:
+        return
+    try:
+        os.remove(config.SHEET_CACHE_PATH)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.warning(f"Could not remove sheet cache {config.SHEET_CACHE_PATH}: {e}")
 
 
 def _parse_int_or_none(value: str) -> int | None:
@@ -57,11 +150,14 @@ async def import_ratings_from_sheet(
     api_base_url: str,
     sheet_csv_url: str,
     progress_callback: Optional[Callable[[int, int, str], None]] = None,
-) -> int:
+    force: bool = False,
+) -> Optional[int]:
     """
     Загружает CSV из Google-таблицы, парсит её и отправляет данные в backend API.
 
-    Возвращает количество импортированных игр.
+    Возвращает количество импортированных игр или None, если таблица не менялась
+    с прошлого импорта и в backend ничего не отправлялось. С force=True кеш
+    таблицы игнорируется: импорт заодно обновляет устаревшие данные BGG в backend.
     Может возбуждать ValueError при проблемах с форматом данных.
     """
     logger.info(f"Starting import from sheet: {sheet_csv_url}")
@@ -75,61 +171,199 @@ async def import_ratings_from_sheet(
             "Укажи ссылку на CSV Google-таблицы в конфигурации бота."
         )
 
-    # Ожидаем готовности backend
-    await _wait_for_backend(api_base_url)
+    # Backend опрашивается параллельно со скачиванием CSV; ждём его только перед первой отправкой
+    backend_ready = asyncio.create_task(_wait_for_backend(api_base_url))
+
+    # Условный запрос: если таблица не менялась, Google вернёт 304 без тела
+    cache = {} if force else _load_sheet_cache(sheet_csv_url)
+    request_headers = {}
+    if cache.get("etag"):
+        request_headers["If-None-Match"] = cache["etag"]
+    if cache.get("last_modified"):
+        request_headers["If-Modified-Since"] = cache["last_modified"]
 
     logger.info("Downloading CSV from Google Sheets...")
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(sheet_csv_url, follow_redirects=True)
-        resp.raise_for_status()
+    client = get_client()
+    try:
+        async with client.stream("GET", sheet_csv_url, headers=request_headers, follow_redirects=True) as resp:
+            if resp.status_code == 304:
+                logger.info("Sheet not modified since last import, skipping")
+                return None
+            resp.raise_for_status()
+
+            # pyarrow.csv не используется: ему нужно всё тело ответа, что ломает потоковый
+            # разбор, а ради небольших таблиц тянуть тяжёлую зависимость не стоит.
+            # Строки CSV разбираются по мере загрузки, без буферизации всего файла
+            rows = _aiter_csv_rows(resp)
+            header = await anext(rows, None)
+
+            if header is None:
+                logger.error("CSV file is empty")
+                raise ValueError("CSV файл пустой или недоступен")
+
+            logger.info(f"First row (header): {header}")
+            if len(header) < 5:
+                logger.error(f"CSV header has insufficient columns: {len(header)}, header: {header}")
+                raise ValueError(f"Недостаточно колонок в заголовке. Ожидается минимум 5, получено {len(header)}. Заголовок: {header}")
+
+            games_count = await _process_sheet_data(api_base_url, header, rows, progress_callback, backend_ready)
+            response_headers = resp.headers
+    finally:
+        if not backend_ready.done():
+            backend_ready.cancel()
+        elif not backend_ready.cancelled():
+            # Забираем ошибку опроса, если импорт упал раньше, чем она понадобилась
+            backend_ready.exception()
+
+    _save_sheet_cache(sheet_csv_url, response_headers)
+    logger.info(f"Import completed successfully: {games_count} games processed")
+    return games_count
 
-    text = resp.text
-    logger.info(f"Raw CSV content length: {len(text)} characters")
-    logger.debug(f"Raw CSV content (first 500 chars): {text[:500]}")
 
-    reader = csv.reader(io.StringIO(text))
-    rows = list(reader)
-    logger.info(f"CSV parsed into {len(rows)} rows")
+async def _aiter_csv_rows(resp: httpx.Response) -> AsyncIterator[List[str]]:
+    """
+    Разбирает CSV из потока ответа построчно.
 
-    if rows:
-        logger.info(f"First row (header): {rows[0]}")
-        if len(rows) > 1:
-            logger.info(f"Second row (first data): {rows[1]}")
+    Запись CSV может занимать несколько строк, если в ячейке есть перевод
+    строки в кавычках, поэтому строки копятся, пока число кавычек не станет чётным.
+    """
+    pending: List[str] = []
+    quotes = 0
+    async for line in _aiter_text_lines(resp):
+        pending.append(line)
+        quotes += line.count('"')
+        if quotes % 2:
+            continue
 
-    if not rows:
-        logger.error("CSV file is empty")
-        raise ValueError("CSV файл пустой или недоступен")
+        # csv.reader получает строки вместе с концами строк и сам восстанавливает \r\n в ячейках.
+        # Из-за кавычки внутри ячейки без кавычек в группе может оказаться несколько записей
+        record, pending = pending, []
+        quotes = 0
+        for parsed in csv.reader(record):
+            yield parsed
 
-    # Проверяем минимальный формат
-    if len(rows) < 2:  # Минимум заголовок + одна строка данных
-        logger.error(f"CSV file has insufficient rows: {len(rows)}")
-        raise ValueError(f"CSV файл содержит только {len(rows)} строк. Минимум требуется заголовок + одна строка данных")
+    for parsed in csv.reader(pending):
+        yield parsed
 
-    header = rows[0]
-    if len(header) < 5:
-        logger.error(f"CSV header has insufficient columns: {len(header)}, header: {header}")
-        raise ValueError(f"Недостаточно колонок в заголовке. Ожидается минимум 5, получено {len(header)}. Заголовок: {header}")
 
-    games_count = await _process_sheet_data(api_base_url, rows, progress_callback)
-    logger.info(f"Import completed successfully: {games_count} games processed")
-    return games_count
+async def _aiter_text_lines(resp: httpx.Response) -> AsyncIterator[str]:
+    """
+    Отдаёт строки текста ответа вместе с концом строки.
 
+    Делит только по переводу строки: aiter_lines() использует str.splitlines
+    и разрывает ячейки с U+2028, U+2029, \\x85 и другими разделителями.
+    """
+    tail = ""
+    async for text in resp.aiter_text():
+        lines = (tail + text).split("\n")
+        tail = lines.pop()
+        for line in lines:
+            yield line + "\n"
+    if tail:
+        yield tail
 
-async def _process_sheet_data(api_base_url: str, rows: List[List[str]], progress_callback: Optional[Callable[[int, int, str], None]] = None) -> int:
-    """Обрабатывает данные листа и отправляет в backend"""
-    logger.info(f"Processing sheet data: {len(rows)} rows")
 
-    if not rows:
-        logger.warning("No rows to process")
-        return 0
+def _new_chunk(user_names: List[str]) -> Dict:
+    """
+    Создаёт пустую часть импорта в колоночном формате.
 
-    logger.info(f"Header row: {rows[0]}")
-    
-    if not rows:
-        logger.warning("No rows to process")
-        return 0
+    ratings[i][j] - оценка игры i пользователем user_names[j], None - пропустить пользователя.
+    """
+    return {
+        "columns": {"name": [], "bgg_id": [], "niza_games_rank": [], "genre": []},
+        "user_names": user_names,
+        "ratings": [],
+    }
+
+
+def _append_game_row(chunk: Dict, row: List[str], row_idx: int, user_names: List[str]) -> bool:
+    """Добавляет строку таблицы в колонки части импорта. Возвращает False для пропускаемых строк."""
+    # Пустая строка (и строка без названия) отсекается по первой ячейке, без прохода по всем колонкам
+    name = row[0].strip() if row else ""
+    if not name:
+        return False
+
+    # Исправленный порядок согласно таблице:
+    # row[0] = название игры
+    # row[1] = жанр
+    # row[2] = bgg_id (ID игры на BGG)
+    # row[3] = НизаГамс (рейтинг Niza Games)
+    # Неизвестный жанр превращается в None, а не передаётся в backend как есть
+    genre_raw = row[1].strip().casefold() if len(row) > 1 else None
+    genre = _GENRE_GET(genre_raw) if genre_raw else None
+    bgg_id = _parse_int_or_none(row[2]) if len(row) > 2 else None
+    niza_rank = _parse_int_or_none(row[3]) if len(row) > 3 else None
+
+    ratings: List[Optional[int]] = []
+    # zip сам обрезает пользователей по длине строки, без проверок индексов
+    for user_name, raw in zip(user_names, row[4:]):
+        cell = raw.strip()
+
+        # Пустая ячейка = не оценивал (rank = 0)
+        if not cell:
+            ratings.append(0)
+            continue
+
+        # Быстрый путь для обычного числа; "нет" и прочий текст проверяем только здесь
+        if cell.isdecimal():
+            rating_value = int(cell)
+        elif cell.lower() == _NO_RATING:
+            # Пропускаем только если явно указано "нет"
+            ratings.append(None)
+            continue
+        else:
+            try:
+                rating_value = int(cell)
+            except ValueError:
+                # Некорректное значение - считаем как не оценивал
+                ratings.append(0)
+                logger.debug(f"Invalid rating value in row {row_idx} for {user_name}: {cell}, setting to 0")
+                continue
+
+        if 1 <= rating_value <= 50:
+            ratings.append(rating_value)
+        else:
+            # Некорректное числовое значение - считаем как не оценивал
+            ratings.append(0)
+            logger.debug(f"Rating value out of range in row {row_idx} for {user_name}: {cell}, setting to 0")
+
+    # Пользователи за пределами короткой строки пропускаются
+    if len(ratings) < len(user_names):
+        ratings.extend([None] * (len(user_names) - len(ratings)))
+
+    columns = chunk["columns"]
+    columns["name"].append(name)
+    columns["bgg_id"].append(bgg_id)
+    columns["niza_games_rank"].append(niza_rank)
+    columns["genre"].append(genre)
+    chunk["ratings"].append(ratings)
+    return True
+
+
+def _build_chunk(rows: List[List[str]], first_row_idx: int, user_names: List[str]) -> Tuple[Dict, int]:
+    """Собирает часть импорта из строк таблицы. Возвращает часть и число пропущенных строк."""
+    chunk = _new_chunk(user_names)
+    skipped = 0
+    for row_idx, row in enumerate(rows, start=first_row_idx):
+        if not _append_game_row(chunk, row, row_idx, user_names):
+            skipped += 1
+    return chunk, skipped
+
+
+async def _process_sheet_data(
+    api_base_url: str,
+    header: List[str],
+    rows: AsyncIterator[List[str]],
+    progress_callback: Optional[Callable[[int, int, str], None]] = None,
+    backend_ready: Optional[Awaitable[None]] = None,
+) -> int:
+    """
+    Обрабатывает данные листа и отправляет в backend.
+
+    Если передан backend_ready, первая часть уходит только после его завершения.
+    """
+    logger.info(f"Header row: {header}")
 
-    header = rows[0]
     if len(header) < 5:
         logger.error(f"Unexpected table format: expected at least 5 columns, got {len(header)}")
         raise ValueError("Неожиданный формат таблицы: ожидается минимум 5 колонок.")
@@ -151,94 +385,96 @@ async def _process_sheet_data(api_base_url: str, rows: List[List[str]], progress
 
     logger.info(f"Final extracted user names: {user_names}")
 
-    data_rows: List[Dict] = []
+    import_url = httpx.URL(f"{api_base_url.rstrip('/')}/api/import-table")
+    semaphore = asyncio.Semaphore(IMPORT_CONCURRENCY)
+    tasks: List[asyncio.Task] = []
+    pending: List[List[str]] = []
+    total = 0
     skipped_rows = 0
-    
-    for row_idx, row in enumerate(rows[1:], start=2):
-        # пропустим полностью пустые строки
-        if not any(cell.strip() for cell in row):
-            skipped_rows += 1
-            continue
-
-        name = (row[0] or "").strip() if len(row) > 0 else ""
-        if not name:
-            skipped_rows += 1
-            continue
-
-        # Исправленный порядок согласно таблице:
-        # row[0] = название игры
-        # row[1] = жанр
-        # row[2] = bgg_id (ID игры на BGG)
-        # row[3] = НизаГамс (рейтинг Niza Games)
-        genre_raw = (row[1] or "").strip().lower() if len(row) > 1 else None
-        genre = GENRE_MAPPING.get(genre_raw, genre_raw) if genre_raw else None
-        bgg_id = _parse_int_or_none(row[2]) if len(row) > 2 else None
-        niza_rank = _parse_int_or_none(row[3]) if len(row) > 3 else None
-
-        ratings: Dict[str, Union[int, str]] = {}
-        for idx, user_name in enumerate(user_names, start=4):
-            if idx >= len(row):
-                continue
-            cell = (row[idx] or "").strip()
-
-            # Пропускаем только если явно указано "нет"
-            if cell.lower() == "нет":
-                continue
-
-            # Для пустых ячеек или других значений создаем запись
-            if not cell:
-                # Пустая ячейка = не оценивал (rank = 0)
-                ratings[user_name] = 0
-            else:
-                try:
-                    rating_value = int(cell)
-                    if 1 <= rating_value <= 50:
-                        ratings[user_name] = rating_value
-                    else:
-                        # Некорректное числовое значение - считаем как не оценивал
-                        ratings[user_name] = 0
-                        logger.debug(f"Rating value out of range in row {row_idx}, column {idx}: {cell}, setting to 0")
-                except ValueError:
-                    # Некорректное значение - считаем как не оценивал
-                    ratings[user_name] = 0
-                    logger.debug(f"Invalid rating value in row {row_idx}, column {idx}: {cell}, setting to 0")
-
-        data_rows.append(
-            {
-                "name": name,
-                "bgg_id": bgg_id,
-                "niza_games_rank": niza_rank,
-                "genre": genre or None,
-                "ratings": ratings,
-            }
+    row_idx = 1
+
+    async def flush() -> None:
+        """Собирает накопленные строки в часть в рабочем потоке и отправляет её в фоне."""
+        nonlocal pending, total, skipped_rows
+        raw_rows, pending = pending, []
+        # Разбор строк не держит event loop: бот продолжает отвечать на апдейты
+        buffer, skipped = await asyncio.to_thread(
+            _build_chunk, raw_rows, row_idx - len(raw_rows) + 1, user_names
         )
-
-    logger.info(f"Processed {len(data_rows)} games, skipped {skipped_rows} rows")
-
-    # Отправляем данные в backend с повторными попытками
-    logger.info(f"Sending {len(data_rows)} games to backend API")
+        skipped_rows += skipped
+        if not buffer["ratings"]:
+            return
+
+        if backend_ready is not None:
+            await backend_ready
+        # Ждём свободный слот, чтобы в памяти было не больше IMPORT_CONCURRENCY частей
+        await semaphore.acquire()
+        # Часть, не отправленная после всех повторов, прерывает импорт сразу,
+        # а не после отправки остальных частей
+        for sent in tasks:
+            if sent.done() and not sent.cancelled() and sent.exception() is not None:
+                semaphore.release()
+                raise sent.exception()
+        task = asyncio.create_task(_send_chunk(import_url, buffer, len(tasks) + 1))
+        task.add_done_callback(lambda _: semaphore.release())
+        tasks.append(task)
+        total += len(buffer["ratings"])
+
+    # Строки отправляются в backend частями по мере разбора CSV
+    try:
+        async for row in rows:
+            row_idx += 1
+            if row_idx == 2:
+                logger.info(f"Second row (first data): {row}")
+
+            pending.append(row)
+            if len(pending) >= IMPORT_CHUNK_SIZE:
+                await flush()
+
+        logger.info(f"CSV parsed into {row_idx} rows")
+        if row_idx < 2:  # Минимум заголовок + одна строка данных
+            logger.error(f"CSV file has insufficient rows: {row_idx}")
+            raise ValueError(f"CSV файл содержит только {row_idx} строк. Минимум требуется заголовок + одна строка данных")
+
+        if pending:
+            await flush()
+        logger.info(f"Processed {total} games, skipped {skipped_rows} rows, sent in {len(tasks)} chunks")
+
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+    return total
+
+
+async def _send_chunk(
+    import_url: httpx.URL,
+    chunk: Dict,
+    chunk_no: int,
+) -> None:
+    """Отправляет одну часть строк в backend с экспоненциальной задержкой между попытками."""
+    client = get_client()
+    # Сериализуем один раз: повторные попытки отправляют те же байты
+    body = orjson.dumps(chunk)
     max_retries = 3
     for attempt in range(max_retries):
         try:
-            logger.info(f"Sending data to backend (attempt {attempt + 1}/{max_retries})")
-            async with httpx.AsyncClient() as client:
-                resp = await client.post(
-                    f"{api_base_url}/api/import-table",
-                    json={"rows": data_rows},
-                    timeout=120.0,  # Увеличиваем таймаут для импорта
-                )
-                resp.raise_for_status()
-                backend_response = resp.json()
-                logger.info(f"Backend response: {backend_response}")
-            logger.info(f"Successfully sent data to backend on attempt {attempt + 1}")
-            break  # Успешно отправили данные
+            logger.info(f"Sending chunk {chunk_no} ({len(chunk['ratings'])} games, attempt {attempt + 1}/{max_retries})")
+            resp = await client.post(
+                import_url,
+                content=body,
+                headers=_JSON_HEADERS,
+                timeout=IMPORT_TIMEOUT,
+            )
+            resp.raise_for_status()
+            backend_response = orjson.loads(resp.content)
+            logger.info(f"Backend response for chunk {chunk_no}: {backend_response}")
+            return
         except Exception as e:
-            logger.error(f"Attempt {attempt + 1} failed: {e}")
+            logger.error(f"Chunk {chunk_no} attempt {attempt + 1} failed: {e}")
             if attempt == max_retries - 1:
                 logger.error(f"Не удалось отправить данные в backend после {max_retries} попыток")
                 raise RuntimeError(f"Не удалось отправить данные в backend после {max_retries} попыток")
-            time.sleep(2 ** attempt)  # Экспоненциальная задержка
-
-    return len(data_rows)
-
-
+            await asyncio.sleep(2 ** attempt)  # Экспоненциальная задержка
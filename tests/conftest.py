@@ -1,29 +1,116 @@
 """
 Pytest fixtures and configuration for testing
 """
+import asyncio
+import sys
+import uuid
+from pathlib import Path
+from unittest.mock import AsyncMock, Mock
+
+# Корень проекта, backend и bot добавляются в sys.path один раз на всю сессию
+ROOT = Path(__file__).parent.parent
+for _path in (ROOT, ROOT / "backend", ROOT / "bot"):
+    if str(_path) not in sys.path:
+        sys.path.insert(0, str(_path))
+
 import pytest
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
 from backend.app.infrastructure.db import Base
 from backend.app.infrastructure.models import GameModel, RatingModel, RankingSessionModel
 
+# Only the Message attributes handlers touch; an explicit list avoids
+# introspecting the aiogram pydantic model for every mock
+_MESSAGE_SPEC = ("text", "from_user", "answer", "answer_photo")
 
-@pytest.fixture
-def test_db():
-    """Create in-memory SQLite database for testing"""
+
+@compiles(UUID, "sqlite")
+def _compile_uuid_sqlite(type_, compiler, **kw):
+    """Models use PostgreSQL UUID columns; store them as hex strings in SQLite"""
+    return "CHAR(32)"
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "unit: fast tests without external services")
+    config.addinivalue_line("markers", "db: tests that use the shared SQLite test database")
+    config.addinivalue_line("markers", "integration: tests that talk to live external services")
+    # Маркер pytest-xdist, регистрируем, чтобы запуск без плагина не ругался
+    config.addinivalue_line("markers", "xdist_group(name): run tests of the group in one xdist worker")
+
+
+def pytest_collection_modifyitems(config, items):
+    """
+    Tag tests by tier so they can be selected with -m.
+
+    Live tests are integration, tests on the test_db fixture are db and share
+    one xdist group (one worker builds the schema once), the rest are unit.
+    """
+    for item in items:
+        if item.path.name.endswith("_live.py") or item.get_closest_marker("integration"):
+            item.add_marker(pytest.mark.integration)
+        elif "test_db" in item.fixturenames:
+            item.add_marker(pytest.mark.db)
+            item.add_marker(pytest.mark.xdist_group("db"))
+        else:
+            item.add_marker(pytest.mark.unit)
+
+
+@pytest.fixture(scope="session")
+def event_loop():
+    """One event loop for the whole session instead of one per async test"""
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture(scope="session")
+def test_engine():
+    """Create in-memory SQLite database schema once per test session"""
     engine = create_engine(
         "sqlite:///:memory:",
         connect_args={"check_same_thread": False},
         poolclass=StaticPool,
     )
 
+    # pysqlite manages BEGIN itself and breaks SAVEPOINTs; let SQLAlchemy emit it
+    @event.listens_for(engine, "connect")
+    def _configure_sqlite_connection(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+        # Models default their ids to PostgreSQL's gen_random_uuid()
+        dbapi_connection.create_function("gen_random_uuid", 0, lambda: uuid.uuid4().hex)
+
+    @event.listens_for(engine, "begin")
+    def _emit_begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
     # Create all tables
     Base.metadata.create_all(bind=engine)
 
-    # Create session
-    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    try:
+        yield engine
+    finally:
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
+
+
+@pytest.fixture
+def test_db(test_engine):
+    """Database session wrapped in a transaction that is rolled back after each test"""
+    connection = test_engine.connect()
+    transaction = connection.begin()
+
+    # Commits inside the code under test only release a SAVEPOINT,
+    # the outer transaction is rolled back after the test
+    TestingSessionLocal = sessionmaker(
+        autocommit=False,
+        autoflush=False,
+        bind=connection,
+        join_transaction_mode="create_savepoint",
+    )
 
     db = TestingSessionLocal()
 
@@ -31,7 +118,8 @@ def test_db():
         yield db
     finally:
         db.close()
-        Base.metadata.drop_all(bind=engine)
+        transaction.rollback()
+        connection.close()
 
 
 @pytest.fixture
@@ -54,20 +142,45 @@ def sample_game_data():
 
 
 @pytest.fixture
-def sample_bgg_response():
+def make_bgg_response():
+    """Factory for BGG API responses; every call builds fresh nested lists"""
+    def _make(**overrides):
+        response = {
+            "id": 12345,
+            "name": "Test Game",
+            "yearpublished": 2020,
+            "rank": 100,
+            "average": 7.5,
+            "bayesaverage": 7.2,
+            "usersrated": 1500,
+            "description": "This is a test game description.",
+            "description_ru": None,
+            "image": "https://example.com/image.jpg",
+            "thumbnail": "https://example.com/thumb.jpg",
+            "categories": ["Strategy"],
+            "mechanics": ["Worker Placement"]
+        }
+        response.update(overrides)
+        return response
+
+    return _make
+
+
+@pytest.fixture
+def sample_bgg_response(make_bgg_response):
     """Sample BGG API response"""
-    return {
-        "id": 12345,
-        "name": "Test Game",
-        "yearpublished": 2020,
-        "rank": 100,
-        "average": 7.5,
-        "bayesaverage": 7.2,
-        "usersrated": 1500,
-        "description": "This is a test game description.",
-        "description_ru": None,
-        "image": "https://example.com/image.jpg",
-        "thumbnail": "https://example.com/thumb.jpg",
-        "categories": ["Strategy"],
-        "mechanics": ["Worker Placement"]
-    }
\ No newline at end of file
+    return make_bgg_response()
+
+
+@pytest.fixture
+def make_message():
+    """Factory for aiogram Message mocks with async answer methods"""
+    def _make(text: str) -> Mock:
+        message = Mock(spec_set=_MESSAGE_SPEC)
+        message.text = text
+        message.from_user = Mock(id=12345, full_name="Test User")
+        message.answer = AsyncMock()
+        message.answer_photo = AsyncMock()
+        return message
+
+    return _make
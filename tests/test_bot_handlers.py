@@ -1,178 +1,115 @@
 """
 Unit tests for bot handlers
 """
+import orjson
 import pytest
-from unittest.mock import Mock, AsyncMock, patch
-from aiogram.types import Message
+import respx
 
 from bot.handlers.bgg_game import cmd_game
 
 
+def _db_game(description_ru):
+    return {
+        "id": 1,
+        "name": "Test Game",
+        "yearpublished": 2020,
+        "usersrated": 1000,
+        "bgg_rank": 50,
+        "average": 8.0,
+        "description": "English description",
+        "description_ru": description_ru,
+        "image": "http://example.com/image.jpg"
+    }
+
+
+# Response bodies are serialized once per module: immutable, shared by
+# every test and not re-encoded by respx on each request
+_JSON = "application/json"
+
+_DB_RESPONSE_RU = orjson.dumps({"games": [_db_game("Русское описание")]})
+_DB_RESPONSE_EN = orjson.dumps({"games": [_db_game(None)]})  # No Russian translation
+_DB_RESPONSE_EMPTY = orjson.dumps({"games": []})
+
+_BGG_RESPONSE = orjson.dumps({
+    "games": [{
+        "id": 99999,
+        "name": "New Game",
+        "yearpublished": 2023,
+        "rank": 200,
+        "average": 7.5,
+        "description": "New game description",
+        "image": "http://example.com/new.jpg"
+    }]
+})
+
+_SAVE_RESPONSE = orjson.dumps({
+    "id": 1,
+    "name": "New Game",
+    "bgg_id": 99999,
+    "description_ru": "Описание новой игры",
+    "image": "http://example.com/new.jpg"
+})
+
+
 class TestGameCommand:
     """Test cases for game command handler"""
 
-    @pytest.mark.asyncio
-    async def test_cmd_game_no_query(self):
-        """Test game command without query parameter"""
-        mock_message = Mock(spec=Message)
-        mock_message.text = "/game"
-        mock_message.from_user.id = 12345
-        mock_message.from_user.full_name = "Test User"
-        mock_message.answer = AsyncMock()
-
-        await cmd_game(mock_message, "http://test.com")
-
-        mock_message.answer.assert_called_once_with(
-            "Пожалуйста, укажи название игры. Пример:\n/game Terraforming Mars"
-        )
-
-    @pytest.mark.asyncio
-    async def test_cmd_game_empty_query(self):
-        """Test game command with empty query"""
-        mock_message = Mock(spec=Message)
-        mock_message.text = "/game   "
-        mock_message.from_user.id = 12345
-        mock_message.from_user.full_name = "Test User"
-        mock_message.answer = AsyncMock()
-
-        await cmd_game(mock_message, "http://test.com")
-
-        mock_message.answer.assert_called_once_with("Название игры не должно быть пустым.")
-
-    @pytest.mark.asyncio
-    async def test_cmd_game_found_in_db_russian(self):
-        """Test game command when game is found in database, Russian language"""
-        mock_message = Mock(spec=Message)
-        mock_message.text = "/game Test Game"
-        mock_message.from_user.id = 12345
-        mock_message.from_user.full_name = "Test User"
-        mock_message.answer_photo = AsyncMock()
-
-        # Mock httpx response for database search
-        mock_response_data = {
-            "games": [{
-                "id": 1,
-                "name": "Test Game",
-                "yearpublished": 2020,
-                "usersrated": 1000,
-                "bgg_rank": 50,
-                "average": 8.0,
-                "description": "English description",
-                "description_ru": "Русское описание",
-                "image": "http://example.com/image.jpg"
-            }]
-        }
-
-        with patch("httpx.AsyncClient") as mock_client_class:
-            mock_client = AsyncMock()
-            mock_client_class.return_value.__aenter__.return_value = mock_client
-
-            mock_response = Mock()
-            mock_response.json.return_value = mock_response_data
-            mock_client.get.return_value.__aenter__.return_value = mock_response
-
-            await cmd_game(mock_message, "http://test.com", "ru")
-
-            # Should call database search first
-            assert mock_client.get.call_count >= 1
-
-            # Should send photo with Russian description
-            mock_message.answer_photo.assert_called_once()
-            call_args = mock_message.answer_photo.call_args
-            assert "Русское описание" in call_args[1]["caption"]
-
-    @pytest.mark.asyncio
-    async def test_cmd_game_found_in_db_english(self):
-        """Test game command when game is found in database, English language"""
-        mock_message = Mock(spec=Message)
-        mock_message.text = "/game Test Game"
-        mock_message.from_user.id = 12345
-        mock_message.from_user.full_name = "Test User"
-        mock_message.answer_photo = AsyncMock()
-
-        # Mock httpx response for database search
-        mock_response_data = {
-            "games": [{
-                "id": 1,
-                "name": "Test Game",
-                "yearpublished": 2020,
-                "usersrated": 1000,
-                "bgg_rank": 50,
-                "average": 8.0,
-                "description": "English description",
-                "description_ru": None,  # No Russian translation
-                "image": "http://example.com/image.jpg"
-            }]
-        }
-
-        with patch("httpx.AsyncClient") as mock_client_class:
-            mock_client = AsyncMock()
-            mock_client_class.return_value.__aenter__.return_value = mock_client
-
-            mock_response = Mock()
-            mock_response.json.return_value = mock_response_data
-            mock_client.get.return_value.__aenter__.return_value = mock_response
-
-            await cmd_game(mock_message, "http://test.com", "en")
-
-            # Should send photo with English description
-            mock_message.answer_photo.assert_called_once()
-            call_args = mock_message.answer_photo.call_args
-            assert "English description" in call_args[1]["caption"]
-
-    @pytest.mark.asyncio
-    async def test_cmd_game_found_on_bgg_and_saved(self):
+    @pytest.mark.parametrize(
+        "text, expected",
+        [
+            ("/game", "Пожалуйста, укажи название игры. Пример:\n/game Terraforming Mars"),
+            # split() drops the trailing spaces, so a blank query is the same as none
+            ("/game   ", "Пожалуйста, укажи название игры. Пример:\n/game Terraforming Mars"),
+        ],
+        ids=["no_query", "blank_query"],
+    )
+    async def test_cmd_game_invalid_query(self, make_message, text, expected):
+        """Test game command without a usable query"""
+        mock_message = make_message(text)
+
+        await cmd_game(mock_message, "http://test.com", "ru")
+
+        mock_message.answer.assert_called_once_with(expected)
+
+    @pytest.mark.parametrize(
+        "lang, response_data, expected_substr",
+        [
+            ("ru", _DB_RESPONSE_RU, "Русское описание"),
+            ("en", _DB_RESPONSE_EN, "English description"),
+        ],
+        ids=["russian", "english"],
+    )
+    @respx.mock
+    async def test_cmd_game_found_in_db(self, make_message, lang, response_data, expected_substr):
+        """Test game command when game is found in database"""
+        mock_message = make_message("/game Test Game")
+
+        search_route = respx.get("http://test.com/api/games/search").respond(content=response_data, content_type=_JSON)
+
+        await cmd_game(mock_message, "http://test.com", lang)
+
+        # Should call database search first
+        assert search_route.called
+
+        # Should send photo with the description in the requested language
+        mock_message.answer_photo.assert_called_once()
+        call_args = mock_message.answer_photo.call_args
+        assert expected_substr in call_args[1]["caption"]
+
+    @respx.mock
+    async def test_cmd_game_found_on_bgg_and_saved(self, make_message):
         """Test game command when game is found on BGG and saved to database"""
-        mock_message = Mock(spec=Message)
-        mock_message.text = "/game New Game"
-        mock_message.from_user.id = 12345
-        mock_message.from_user.full_name = "Test User"
-        mock_message.answer_photo = AsyncMock()
-
-        # Mock empty database response
-        db_response_data = {"games": []}
-
-        # Mock BGG response
-        bgg_response_data = {
-            "games": [{
-                "id": 99999,
-                "name": "New Game",
-                "yearpublished": 2023,
-                "rank": 200,
-                "average": 7.5,
-                "description": "New game description",
-                "image": "http://example.com/new.jpg"
-            }]
-        }
-
-        # Mock save response
-        save_response_data = {
-            "id": 1,
-            "name": "New Game",
-            "bgg_id": 99999
-        }
-
-        with patch("httpx.AsyncClient") as mock_client_class:
-            mock_client = AsyncMock()
-            mock_client_class.return_value.__aenter__.return_value = mock_client
-
-            # Configure different responses for different calls
-            mock_responses = []
-            for data in [db_response_data, bgg_response_data, save_response_data]:
-                mock_resp = Mock()
-                mock_resp.json.return_value = data
-                mock_resp.raise_for_status.return_value = None
-                mock_responses.append(mock_resp)
-
-            mock_client.get.side_effect = mock_responses[:2]  # DB search and BGG search
-            mock_client.post.return_value.__aenter__.return_value = mock_responses[2]  # Save operation
-
-            await cmd_game(mock_message, "http://test.com", "ru")
-
-            # Should search database first
-            # Then search BGG
-            # Then save to database
-            # Finally display result
-            assert mock_client.get.call_count == 2  # DB + BGG searches
-            assert mock_client.post.call_count == 1  # Save operation
-            mock_message.answer_photo.assert_called_once()
\ No newline at end of file
+        mock_message = make_message("/game New Game")
+
+        db_route = respx.get("http://test.com/api/games/search").respond(content=_DB_RESPONSE_EMPTY, content_type=_JSON)
+        bgg_route = respx.get("http://test.com/api/bgg/search").respond(content=_BGG_RESPONSE, content_type=_JSON)
+        save_route = respx.post("http://test.com/api/games/save-from-bgg").respond(content=_SAVE_RESPONSE, content_type=_JSON)
+
+        await cmd_game(mock_message, "http://test.com", "ru")
+
+        # Database miss, then BGG search, then save, then the saved game is shown
+        assert db_route.call_count == 1
+        assert bgg_route.call_count == 1
+        assert save_route.call_count == 1
+        mock_message.answer_photo.assert_called_once()
+        assert "Описание новой игры" in mock_message.answer_photo.call_args[1]["caption"]
@@ -1,82 +1,37 @@
-#!/usr/bin/env python3
 """
-Скрипт для тестирования конфигурации приложения
+Tests for backend and bot configuration loading
 """
-import os
-import sys
-from pathlib import Path
-
-# Добавляем корень проекта в sys.path
-project_root = Path(__file__).parent.parent
-sys.path.insert(0, str(project_root))
-
-def test_backend_config():
-    """Тестирование backend конфигурации"""
-    print("🔧 Тестирование backend конфигурации...")
-
-    try:
-        sys.path.insert(0, str(project_root / 'backend'))
-        from app.config import config
-
-        print("✅ Backend config загружен")
-        print(f"   DATABASE_URL: {config.DATABASE_URL}")
-        print(f"   DB_HOST: {config.DB_HOST}")
-        print(f"   DB_USER: {config.DB_USER}")
-        print(f"   APP_ENV: {config.APP_ENV}")
-        print(f"   DEBUG: {config.DEBUG}")
-        print(f"   DEFAULT_LANGUAGE: {config.DEFAULT_LANGUAGE}")
-        print(f"   GAME_UPDATE_DAYS: {config.GAME_UPDATE_DAYS}")
-
-        return True
-    except Exception as e:
-        print(f"❌ Ошибка backend config: {e}")
-        return False
-
-def test_bot_config():
-    """Тестирование bot конфигурации"""
-    print("\n🤖 Тестирование bot конфигурации...")
-
-    try:
-        sys.path.insert(0, str(project_root / 'bot'))
-        from config import config
-
-        print("✅ Bot config загружен")
-        print(f"   BOT_TOKEN: {'***' + config.BOT_TOKEN[-4:] if config.BOT_TOKEN else 'не задан'}")
-        print(f"   ADMIN_USER_ID: {config.ADMIN_USER_ID}")
-        print(f"   API_BASE_URL: {config.API_BASE_URL}")
-        print(f"   RATING_SHEET_CSV_URL: {'***' if config.RATING_SHEET_CSV_URL else 'не задан'}")
-        print(f"   DB_HOST: {config.DB_HOST}")
-        print(f"   DATABASE_URL: {config.DATABASE_URL}")
-
-        # Валидация
-        try:
-            config.validate()
-            print("✅ Конфигурация прошла валидацию")
-        except ValueError as e:
-            print(f"⚠️  Валидация: {e}")
-
-        return True
-    except Exception as e:
-        print(f"❌ Ошибка bot config: {e}")
-        return False
-
-def main():
-    print("🚀 Тестирование конфигурации Board Game Ranker")
-    print("=" * 50)
-
-    backend_ok = test_backend_config()
-    bot_ok = test_bot_config()
-
-    print("\n" + "=" * 50)
-    if backend_ok and bot_ok:
-        print("🎉 Все конфигурации загружены успешно!")
-    else:
-        print("❌ Есть проблемы с конфигурацией")
-
-    print("\n💡 Советы:")
-    print("- Создайте .env файл на основе env.example")
-    print("- Установите BOT_TOKEN и RATING_SHEET_CSV_URL")
-    print("- Проверьте DATABASE_URL для вашей среды")
-
-if __name__ == "__main__":
-    main()
+import importlib
+
+import pytest
+
+
+@pytest.mark.parametrize(
+    "module_path, expected_attrs",
+    [
+        (
+            "backend.app.config",
+            ["DATABASE_URL", "DB_HOST", "DB_USER", "APP_ENV", "DEBUG", "DEFAULT_LANGUAGE", "GAME_UPDATE_DAYS"],
+        ),
+        (
+            "bot.config",
+            ["BOT_TOKEN", "ADMIN_USER_ID", "API_BASE_URL", "RATING_SHEET_CSV_URL", "DB_HOST", "DATABASE_URL"],
+        ),
+    ],
+    ids=["backend", "bot"],
+)
+def test_config_loads(module_path, expected_attrs):
+    """Config module imports and exposes the expected settings"""
+    config = importlib.import_module(module_path).config
+
+    for attr in expected_attrs:
+        assert hasattr(config, attr), f"{module_path}.config has no {attr}"
+
+
+def test_bot_config_validate_requires_token(monkeypatch):
+    """Bot config validation fails loudly when BOT_TOKEN is missing"""
+    config = importlib.import_module("bot.config").config
+    monkeypatch.setattr(config, "BOT_TOKEN", "")
+
+    with pytest.raises(ValueError, match="BOT_TOKEN"):
+        config.validate()
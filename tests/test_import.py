@@ -1,129 +1,90 @@
-#!/usr/bin/env python3
 """
-Test script for import functionality
+Tests for import payload structure and the import API request model
 """
-import asyncio
-import sys
 import json
 from pathlib import Path
 
-# Добавляем корень проекта в sys.path
-project_root = Path(__file__).parent.parent
-sys.path.insert(0, str(project_root))
+import pytest
 
+project_root = Path(__file__).parent.parent
 
-async def test_import_from_test_data():
-    """Test import using local test data"""
-    print("📊 Testing import functionality with test data...")
 
-    try:
-        # Load test data
-        test_data_path = project_root / "tests" / "test_payload.json"
-        with open(test_data_path, 'r', encoding='utf-8') as f:
-            test_data = json.load(f)
+@pytest.fixture(scope="session")
+def test_payload():
+    """Load tests/test_payload.json once per session"""
+    # Binary read: json.loads detects the file encoding (the payload is UTF-16) from the bytes
+    with open(project_root / "tests" / "test_payload.json", "rb") as f:
+        return json.loads(f.read())
 
-        print(f"✅ Test data loaded: {len(test_data['rows'])} games")
 
-        # Import the data using backend API directly
-        sys.path.insert(0, str(project_root / 'backend'))
-        from app.infrastructure.repositories import replace_all_from_table
-        from app.infrastructure.db import get_db_session
+def test_import_from_test_data(test_payload):
+    """Test data rows have the fields the importer expects"""
+    rows = test_payload["rows"]
+    assert rows, "test payload has no rows"
 
-        # This would require a database connection
-        # For now, just test that the data structure is valid
-        rows = test_data['rows']
-        for row in rows:
-            required_fields = ['name', 'genre', 'ratings']
-            for field in required_fields:
-                if field not in row:
-                    raise ValueError(f"Missing required field '{field}' in test data")
+    for row in rows:
+        for field in ("name", "genre", "ratings"):
+            assert field in row, f"Missing required field '{field}' in test data"
 
-        print("✅ Test data structure is valid")
-        print(f"   Games to import: {len(rows)}")
 
-        # Show sample data
-        sample = rows[0]
-        print(f"   Sample game: {sample['name']}")
-        print(f"   Genre: {sample['genre']}")
-        print(f"   Ratings count: {len(sample['ratings'])}")
+def test_api_import_simulation(test_payload):
+    """Test payload is accepted by the import API request model"""
+    from app.api.import_table import ImportTableRequest
 
-        return True
+    request = ImportTableRequest(
+        rows=test_payload["rows"],
+        is_forced_update=False
+    )
 
-    except Exception as e:
-        print(f"❌ Import test failed: {e}")
-        return False
+    assert len(request.rows) == len(test_payload["rows"])
+    assert request.is_forced_update is False
 
 
-async def test_api_import_simulation():
-    """Test API import endpoint simulation"""
-    print("🌐 Testing API import simulation...")
+def _columnar_request(**overrides):
+    from app.api.import_table import ImportTableRequest
 
-    try:
-        # Test that we can import required modules
-        sys.path.insert(0, str(project_root / 'backend'))
-        from app.api.import_table import ImportTableRequest
+    payload = {
+        "columns": {
+            "name": ["Game A", "Game B"],
+            "bgg_id": [1, None],
+            "niza_games_rank": [None, 5],
+            "genre": ["euro", None],
+        },
+        "user_names": ["Anna", "Boris"],
+        "ratings": [[10, None], [None, None]],
+    }
+    payload.update(overrides)
+    return ImportTableRequest(**payload)
 
-        # Load test data
-        test_data_path = project_root / "tests" / "test_payload.json"
-        with open(test_data_path, 'r', encoding='utf-8') as f:
-            test_data = json.load(f)
 
-        # Create request object
-        request = ImportTableRequest(
-            rows=test_data['rows'],
-            is_forced_update=False
-        )
+def test_rows_from_columns():
+    """Columnar payload is converted to rows, None ratings are dropped"""
+    from app.api.import_table import _rows_from_columns
 
-        print("✅ API request object created successfully")
-        print(f"   Rows: {len(request.rows)}")
-        print(f"   Forced update: {request.is_forced_update}")
+    rows = _rows_from_columns(_columnar_request())
 
-        return True
+    assert rows == [
+        {"name": "Game A", "bgg_id": 1, "niza_games_rank": None, "genre": "euro", "ratings": {"Anna": 10}},
+        {"name": "Game B", "bgg_id": None, "niza_games_rank": 5, "genre": None, "ratings": {}},
+    ]
 
-    except Exception as e:
-        print(f"❌ API simulation test failed: {e}")
-        return False
 
+@pytest.mark.parametrize(
+    "overrides",
+    [
+        {"ratings": [[10, None]]},
+        {"ratings": [[10, None], [None]]},
+        {"rows": [{"name": "Game C", "ratings": {}}]},
+    ],
+    ids=["column_length_mismatch", "ratings_row_mismatch", "rows_and_columns"],
+)
+def test_rows_from_columns_rejects_inconsistent_payload(overrides):
+    """Inconsistent columnar payloads are rejected with 400"""
+    from fastapi import HTTPException
 
-async def main():
-    """Run import tests"""
-    print("🚀 Import Functionality Tests")
-    print("=" * 50)
+    from app.api.import_table import _rows_from_columns
 
-    tests = [
-        ("Data Structure Test", test_import_from_test_data),
-        ("API Simulation Test", test_api_import_simulation),
-    ]
+    with pytest.raises(HTTPException) as exc_info:
+        _rows_from_columns(_columnar_request(**overrides))
 
-    results = []
-    for test_name, test_func in tests:
-        print(f"\n{'='*10} {test_name} {'='*10}")
-        success = await test_func()
-        results.append((test_name, success))
-
-    print("\n" + "=" * 50)
-    print("📊 Import Test Results:")
-
-    all_passed = True
-    for test_name, success in results:
-        status = "✅ PASSED" if success else "❌ FAILED"
-        print(f"  {test_name}: {status}")
-        if not success:
-            all_passed = False
-
-    print("\n" + "=" * 50)
-    if all_passed:
-        print("🎉 All import tests passed!")
-        print("\n💡 To test full import functionality:")
-        print("1. Start the backend server: cd backend && python wsgi.py")
-        print("2. Run: python tests/test_import.py --full")
-    else:
-        print("❌ Some import tests failed.")
-
-    return all_passed
-
-
-if __name__ == "__main__":
-    import sys
-    success = asyncio.run(main())
-    sys.exit(0 if success else 1)
+    assert exc_info.value.status_code == 400
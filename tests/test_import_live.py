@@ -0,0 +1,31 @@
+"""
+Live smoke test for the ratings sheet download (opt-in, hits Google Sheets)
+"""
+import os
+
+import pytest
+
+pytestmark = pytest.mark.skipif(
+    not os.environ.get("RUN_LIVE"),
+    reason="live Google Sheets test, set RUN_LIVE=1 to run",
+)
+
+
+async def test_live_sheet_header_is_importable():
+    """Configured sheet downloads and its header has the columns the importer expects"""
+    from bot.config import config
+    from bot.services.http_client import close_client, get_client
+    from bot.services.import_ratings import _aiter_csv_rows
+
+    if not config.RATING_SHEET_CSV_URL:
+        pytest.skip("RATING_SHEET_CSV_URL is not configured")
+
+    try:
+        async with get_client().stream("GET", config.RATING_SHEET_CSV_URL, follow_redirects=True) as resp:
+            resp.raise_for_status()
+            header = await anext(_aiter_csv_rows(resp), None)
+    finally:
+        await close_client()
+
+    assert header is not None
+    assert len(header) >= 5
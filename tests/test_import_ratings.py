@@ -0,0 +1,154 @@
+"""
+Unit tests for sheet CSV parsing and chunk building in the ratings importer
+"""
+import csv
+import io
+
+import httpx
+import pytest
+import respx
+
+from bot.services import import_ratings
+from bot.services.import_ratings import _aiter_csv_rows, _build_chunk
+
+
+async def _parse(body: str, chunk_size: int = 3) -> list:
+    """Stream body through httpx in small pieces and collect the parsed rows"""
+    data = body.encode("utf-8")
+
+    async def _stream():
+        # Small pieces split lines, quoted cells and multibyte characters
+        for i in range(0, len(data), chunk_size):
+            yield data[i:i + chunk_size]
+
+    transport = httpx.MockTransport(
+        lambda request: httpx.Response(200, content=_stream(), headers={"content-type": "text/csv; charset=utf-8"})
+    )
+    async with httpx.AsyncClient(transport=transport) as client:
+        async with client.stream("GET", "http://sheet.test/export") as resp:
+            return [row async for row in _aiter_csv_rows(resp)]
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        'name,genre\r\n"Line 1\r\nLine 2",евро\r\n',
+        'name,genre\n"Line 1\nLine 2\n\nLine 4",евро\n',
+        "name,genre\nGame\u2028X,евро\nNext\x0bGame\x85,кооп\n",
+        "name,genre,bgg\n\nGame,евро,1\n\n",
+        "name,genre,bgg,niza\nShort\nGame,евро\n",
+        'name,genre\n"Quoted ""name""",евро',
+        'name,genre\nGame 5" box,евро\nNext,кооп\nThird,кооп\n',
+    ],
+    ids=[
+        "quoted_crlf", "quoted_lf", "unicode_separators", "blank_rows", "short_rows", "no_trailing_newline",
+        "stray_quote",
+    ],
+)
+async def test_aiter_csv_rows_matches_csv_reader(body):
+    """Streaming parser gives the same rows as csv.reader over the whole text"""
+    expected = list(csv.reader(io.StringIO(body, newline="")))
+
+    assert await _parse(body) == expected
+
+
+async def test_aiter_csv_rows_keeps_line_separator_inside_cell():
+    """U+2028 inside a cell does not split the sheet row"""
+    rows = await _parse("name,genre\nGame\u2028X,евро\n")
+
+    assert rows == [["name", "genre"], ["Game\u2028X", "евро"]]
+
+
+def test_build_chunk_short_and_blank_rows():
+    """Blank rows are skipped, users past the end of a short row get None"""
+    user_names = ["Anna", "Boris", "Vera"]
+    rows = [
+        ["Game A", "Евро", "123", "5", "10", "нет", ""],
+        [],
+        ["", "Кооп"],
+        ["Game B", "кооп", "", "", "7"],
+        ["Game C"],
+    ]
+
+    chunk, skipped = _build_chunk(rows, 2, user_names)
+
+    assert skipped == 2
+    assert chunk["columns"] == {
+        "name": ["Game A", "Game B", "Game C"],
+        "bgg_id": [123, None, None],
+        "niza_games_rank": [5, None, None],
+        "genre": ["euro", "coop", None],
+    }
+    assert chunk["user_names"] == user_names
+    assert chunk["ratings"] == [
+        [10, None, 0],
+        [7, None, None],
+        [None, None, None],
+    ]
+
+
+class TestSheetCache:
+    """Test cases for conditional sheet download in import_ratings_from_sheet"""
+
+    _API = "http://backend.test"
+    _SHEET = "http://sheet.test/export"
+    _CSV = "name,genre,bgg,niza,Anna\nGame A,евро,1,2,10\n"
+
+    @pytest.fixture(autouse=True)
+    def _sheet_cache(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(import_ratings.config, "SHEET_CACHE_PATH", str(tmp_path / "sheet_cache.json"))
+
+    @respx.mock
+    async def test_not_modified_sheet_is_reported(self):
+        """Unchanged sheet returns None and sends nothing to the backend"""
+        respx.get(f"{self._API}/health").respond(json={"status": "ok"})
+        import_route = respx.post(f"{self._API}/api/import-table").respond(json={"status": "ok"})
+        sheet_route = respx.get(self._SHEET)
+        sheet_route.side_effect = [
+            httpx.Response(200, text=self._CSV, headers={"etag": '"v1"'}),
+            httpx.Response(304),
+        ]
+
+        assert await import_ratings.import_ratings_from_sheet(self._API, self._SHEET) == 1
+        assert await import_ratings.import_ratings_from_sheet(self._API, self._SHEET) is None
+
+        assert sheet_route.calls[1].request.headers["if-none-match"] == '"v1"'
+        assert import_route.call_count == 1
+
+    @respx.mock
+    async def test_force_bypasses_sheet_cache(self):
+        """force=True downloads and imports the sheet without validators"""
+        respx.get(f"{self._API}/health").respond(json={"status": "ok"})
+        import_route = respx.post(f"{self._API}/api/import-table").respond(json={"status": "ok"})
+        sheet_route = respx.get(self._SHEET).respond(text=self._CSV, headers={"etag": '"v1"'})
+
+        await import_ratings.import_ratings_from_sheet(self._API, self._SHEET)
+        imported = await import_ratings.import_ratings_from_sheet(self._API, self._SHEET, force=True)
+
+        assert imported == 1
+        assert "if-none-match" not in sheet_route.calls[1].request.headers
+        assert import_route.call_count == 2
+
+
+async def test_failed_chunk_stops_import(monkeypatch):
+    """A chunk that failed all retries aborts the import before more chunks are sent"""
+    sent = []
+
+    async def _send_chunk(import_url, chunk, chunk_no):
+        sent.append(chunk_no)
+        raise RuntimeError("backend down")
+
+    monkeypatch.setattr(import_ratings, "IMPORT_CHUNK_SIZE", 1)
+    monkeypatch.setattr(import_ratings, "_send_chunk", _send_chunk)
+
+    async def _rows():
+        for i in range(10):
+            yield [f"Game {i}", "евро", "", "", "5"]
+
+    with pytest.raises(RuntimeError, match="backend down"):
+        await import_ratings._process_sheet_data(
+            "http://backend.test", ["name", "genre", "bgg", "niza", "Anna"], _rows()
+        )
+
+    # The failure is noticed once a concurrency slot frees up, not after all 10 chunks
+    assert len(sent) <= import_ratings.IMPORT_CONCURRENCY + 1
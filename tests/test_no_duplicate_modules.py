@@ -0,0 +1,28 @@
+"""
+Guard against duplicated definitions in bot services
+"""
+import ast
+from collections import defaultdict
+from pathlib import Path
+
+SERVICES_DIR = Path(__file__).resolve().parent.parent / "bot" / "services"
+
+
+def _top_level_symbols(path: Path):
+    tree = ast.parse(path.read_text(encoding="utf-8"), filename=str(path))
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            # Private helpers may legitimately share names across modules
+            if not node.name.startswith("_"):
+                yield node.name
+
+
+def test_services_do_not_define_same_public_symbol_twice():
+    """Each public function/class in bot/services must live in exactly one module"""
+    owners = defaultdict(list)
+    for path in sorted(SERVICES_DIR.rglob("*.py")):
+        for name in _top_level_symbols(path):
+            owners[name].append(str(path.relative_to(SERVICES_DIR)))
+
+    duplicates = {name: files for name, files in owners.items() if len(files) > 1}
+    assert not duplicates, f"Duplicated service symbols: {duplicates}"
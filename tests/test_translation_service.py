@@ -1,6 +1,8 @@
 """
 Unit tests for translation service
 """
+import asyncio
+
 import pytest
 from unittest.mock import Mock, patch, AsyncMock
 
@@ -10,83 +12,74 @@ from backend.app.services.translation import TranslationService, translate_game_
 class TestTranslationService:
     """Test cases for TranslationService"""
 
-    def test_init_without_googletrans(self):
-        """Test initialization when googletrans is not available"""
-        with patch.dict('sys.modules', {'googletrans': None}):
-            service = TranslationService()
-            assert service.translator is None
-
-    def test_init_with_googletrans(self):
-        """Test initialization when googletrans is available"""
-        with patch('backend.app.services.translation.googletrans') as mock_googletrans:
-            mock_googletrans.Translator.return_value = Mock()
+    @pytest.mark.parametrize(
+        "googletrans_available, has_translator",
+        [(False, False), (True, True)],
+        ids=["without_googletrans", "with_googletrans"],
+    )
+    def test_init(self, googletrans_available, has_translator):
+        """Test initialization with and without googletrans installed"""
+        with patch("backend.app.services.translation.GOOGLETRANS_AVAILABLE", googletrans_available), \
+                patch("backend.app.services.translation.Translator", create=True) as mock_translator_class:
             service = TranslationService()
-            assert service.translator is not None
-            mock_googletrans.Translator.assert_called_once()
 
-    def test_translate_empty_text(self):
-        """Test translation of empty text"""
-        service = TranslationService()
-        result = service.translate_to_russian("")
-        assert result is None
+        assert (service.translator is not None) is has_translator
+        assert mock_translator_class.called is has_translator
 
-    def test_translate_none_text(self):
-        """Test translation of None text"""
+    @pytest.mark.parametrize("text", ["", None], ids=["empty", "none"])
+    async def test_translate_empty_text(self, text):
+        """Test translation of empty or missing text"""
         service = TranslationService()
-        result = service.translate_to_russian(None)
+        result = await service.translate_to_russian(text)
         assert result is None
 
-    def test_translate_without_translator(self):
+    async def test_translate_without_translator(self):
         """Test translation when translator is not available"""
         service = TranslationService()
         service.translator = None
-        result = service.translate_to_russian("Hello world")
+        result = await service.translate_to_russian("Hello world")
         assert result is None
 
-    @pytest.mark.asyncio
     async def test_translate_success(self):
         """Test successful translation"""
         service = TranslationService()
         mock_result = Mock()
         mock_result.text = "Привет мир"
 
-        with patch.object(service, 'translator') as mock_translator:
-            mock_translator.translate.return_value = mock_result
+        service.translator = Mock()
+        service.translator.translate.return_value = mock_result
 
-            result = await service.translate_to_russian("Hello world")
+        result = await service.translate_to_russian("Hello world")
 
-            assert result == "Привет мир"
-            mock_translator.translate.assert_called_once_with("Hello world", src='en', dest='ru')
+        assert result == "Привет мир"
+        service.translator.translate.assert_called_once_with("Hello world", src='en', dest='ru')
 
-    @pytest.mark.asyncio
     async def test_translate_exception(self):
         """Test translation with exception"""
         service = TranslationService()
 
-        with patch.object(service, 'translator') as mock_translator:
-            mock_translator.translate.side_effect = Exception("Translation failed")
-
-            result = await service.translate_to_russian("Hello world")
+        service.translator = Mock()
+        service.translator.translate.side_effect = Exception("Translation failed")
 
-            assert result is None
+        result = await service.translate_to_russian("Hello world")
 
-    def test_is_available_with_translator(self):
-        """Test is_available when translator exists"""
-        service = TranslationService()
-        service.translator = Mock()
-        assert service.is_available() is True
+        assert result is None
 
-    def test_is_available_without_translator(self):
-        """Test is_available when translator doesn't exist"""
+    @pytest.mark.parametrize(
+        "translator, expected",
+        [(Mock(), True), (None, False)],
+        ids=["with_translator", "without_translator"],
+    )
+    async def test_is_available(self, translator, expected):
+        """Test is_available reflects whether a translator exists"""
         service = TranslationService()
-        service.translator = None
-        assert service.is_available() is False
+        service.translator = translator
+        assert await service.is_available() is expected
 
 
 class TestBackgroundTranslation:
     """Test cases for background translation function"""
 
-    @pytest.mark.asyncio
     async def test_translate_game_descriptions_background(self):
         """Test background translation function"""
         mock_db = Mock()
@@ -96,4 +89,27 @@ class TestBackgroundTranslation:
 
             await translate_game_descriptions_background(mock_db)
 
-            mock_service.translate_game_descriptions_background.assert_called_once_with(mock_db)
\ No newline at end of file
+            mock_service.translate_game_descriptions_background.assert_called_once_with(mock_db)
+
+    async def test_background_translation_is_single_flight(self):
+        """Requests during a running pass are merged into one extra pass"""
+        release = asyncio.Event()
+        calls = []
+
+        async def _pass(db):
+            calls.append(db)
+            if len(calls) == 1:
+                await release.wait()
+
+        with patch('backend.app.services.translation.translation_service') as mock_service:
+            mock_service.translate_game_descriptions_background = _pass
+
+            first = asyncio.create_task(translate_game_descriptions_background("chunk-1"))
+            await asyncio.sleep(0)
+            # Two more chunks finish while the first pass is still running
+            await translate_game_descriptions_background("chunk-2")
+            await translate_game_descriptions_background("chunk-3")
+            release.set()
+            await first
+
+        assert calls == ["chunk-1", "chunk-1"]